@@ -1,14 +1,17 @@
 # air_quality_app/app/api/v1/endpoints/aqi.py
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from typing import List, Optional
 from app.services.aqi_service import openaq_service
 from app.schemas.aqi import LatestAQIResult, Location, HistoricalAQIResponse
+from app.core.config import settings
+from app.core.http_cache import conditional_response, latest_timestamp
+from app.core.profiling import ProfiledRoute
 import logging
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 @router.get(
     "/aqi/latest",
@@ -17,6 +20,8 @@ router = APIRouter()
     description="Fetches the latest air quality measurements based on city or coordinates."
 )
 async def get_latest_aqi(
+    request: Request,
+    response: Response,
     city: Optional[str] = Query(None, description="City name (e.g., 'Delhi', 'London')"),
     latitude: Optional[float] = Query(None, description="Latitude for coordinates"),
     longitude: Optional[float] = Query(None, description="Longitude for coordinates")
@@ -37,6 +42,13 @@ async def get_latest_aqi(
         data = await openaq_service.get_latest_aqi(city=city, coordinates=coordinates_str)
         if not data:
             raise HTTPException(status_code=404, detail="No AQI data found for the specified location.")
+        # Validate against the newest measurement before building the response body
+        last_updated = latest_timestamp(
+            m.get("lastUpdated") for result in data for m in result.get("measurements", [])
+        )
+        not_modified = conditional_response(request, response, last_updated, settings.CACHE_MAX_AGE_AQI_LATEST)
+        if not_modified:
+            return not_modified
         return data
     except HTTPException as e:
         raise e # Re-raise FastAPI HTTP exceptions
@@ -51,6 +63,8 @@ async def get_latest_aqi(
     description="Fetches a list of air quality monitoring locations available in OpenAQ."
 )
 async def get_available_locations(
+    request: Request,
+    response: Response,
     city: Optional[str] = Query(None, description="Filter locations by city"),
     country: Optional[str] = Query(None, description="Filter locations by country code (e.g., 'IN', 'US')"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of locations to return")
@@ -61,6 +75,10 @@ async def get_available_locations(
     """
     try:
         data = await openaq_service.get_locations(city=city, country=country, limit=limit)
+        last_updated = latest_timestamp(loc.get("lastUpdated") for loc in data)
+        not_modified = conditional_response(request, response, last_updated, settings.CACHE_MAX_AGE_LOCATIONS)
+        if not_modified:
+            return not_modified
         return data
     except Exception as e:
         logger.error(f"Error in get_available_locations endpoint: {e}")
@@ -73,6 +91,8 @@ async def get_available_locations(
     description="Fetches historical air quality measurements for a specific location ID."
 )
 async def get_historical_measurements(
+    request: Request,
+    response: Response,
     location_id: int,
     date_from: str = Query(..., description="Start date/time in ISO 8601 format (e.g., '2023-01-01T00:00:00Z')"),
     date_to: str = Query(..., description="End date/time in ISO 8601 format (e.g., '2023-01-02T00:00:00Z')"),
@@ -91,6 +111,10 @@ async def get_historical_measurements(
             date_to=date_to,
             limit=limit
         )
+        last_updated = latest_timestamp((m.get("date") or {}).get("utc") for m in measurements)
+        not_modified = conditional_response(request, response, last_updated, settings.CACHE_MAX_AGE_AQI_HISTORICAL)
+        if not_modified:
+            return not_modified
         return {"measurements": measurements}
     except HTTPException as e:
         raise e
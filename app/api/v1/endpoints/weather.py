@@ -1,14 +1,21 @@
 # air_quality_app/app/api/v1/endpoints/weather.py
 
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from typing import Literal, Optional
 from app.services.weather_service import openweathermap_service
+from app.services.forecast_store import forecast_store, ForecastQuotaExceeded
 from app.schemas.weather import CurrentWeatherResponse, ForecastWeatherResponse
+from app.core.config import settings
+from app.core.http_cache import conditional_response, latest_timestamp
+from app.core.profiling import ProfiledRoute
 import logging
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
+
+# Units accepted by OpenWeatherMap; also part of the forecast grid cell key
+Units = Literal["metric", "imperial", "standard"]
 
 @router.get(
     "/weather/current",
@@ -17,15 +24,22 @@ router = APIRouter()
     description="Fetches current weather data for given coordinates."
 )
 async def get_current_weather_data(
+    request: Request,
+    response: Response,
     latitude: float = Query(..., description="Latitude for weather data"),
     longitude: float = Query(..., description="Longitude for weather data"),
-    units: str = Query("metric", description="Units of measurement (metric, imperial, standard)")
+    units: Units = Query("metric", description="Units of measurement (metric, imperial, standard)")
 ):
     """
     Retrieves current weather conditions for specified geographical coordinates.
     """
     try:
         data = await openweathermap_service.get_current_weather(lat=latitude, lon=longitude, units=units)
+        # `dt` is the time OpenWeatherMap calculated this observation
+        last_updated = latest_timestamp([data.get("dt")])
+        not_modified = conditional_response(request, response, last_updated, settings.CACHE_MAX_AGE_WEATHER_CURRENT)
+        if not_modified:
+            return not_modified
         return data
     except HTTPException as e:
         raise e
@@ -37,22 +51,37 @@ async def get_current_weather_data(
     "/weather/forecast",
     response_model=ForecastWeatherResponse,
     summary="Get Weather Forecast",
-    description="Fetches 5-day weather forecast data for given coordinates (3-hour step)."
+    description="Fetches 5-day weather forecast data for given coordinates (3-hour step), resolved to the nearest forecast grid cell."
 )
 async def get_forecast_weather_data(
+    request: Request,
+    response: Response,
     latitude: float = Query(..., description="Latitude for weather forecast"),
     longitude: float = Query(..., description="Longitude for weather forecast"),
-    units: str = Query("metric", description="Units of measurement (metric, imperial, standard)"),
+    units: Units = Query("metric", description="Units of measurement (metric, imperial, standard)"),
     cnt: int = Query(40, ge=1, le=40, description="Number of timestamps to return (max 40 for 5 days / 3-hour step)")
 ):
     """
     Retrieves a 5-day weather forecast (with data every 3 hours) for specified geographical coordinates.
+    Forecasts are served from the in-memory grid store, so nearby coordinates share one upstream call.
     """
     try:
-        data = await openweathermap_service.get_forecast_weather(lat=latitude, lon=longitude, units=units, cnt=cnt)
+        data = await forecast_store.get_forecast(lat=latitude, lon=longitude, units=units, cnt=cnt)
+        # Forecast slot times lie in the future, so the cell's upstream fetch time versions it instead
+        last_updated = latest_timestamp([forecast_store.last_fetched(lat=latitude, lon=longitude, units=units)])
+        not_modified = conditional_response(request, response, last_updated, settings.CACHE_MAX_AGE_WEATHER_FORECAST)
+        if not_modified:
+            return not_modified
         return data
     except HTTPException as e:
         raise e
+    except ForecastQuotaExceeded as e:
+        logger.warning(f"Forecast request rejected: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Weather forecast temporarily unavailable, please retry shortly.",
+            headers={"Retry-After": "60"}
+        )
     except Exception as e:
         logger.error(f"Error in get_forecast_weather_data endpoint: {e}")
         raise HTTPException(status_code=500, detail="Internal server error while fetching weather forecast data.")
\ No newline at end of file
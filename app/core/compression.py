@@ -0,0 +1,87 @@
+# air_quality_app/app/core/compression.py
+
+from typing import Set
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli  # Optional: without it we only negotiate gzip
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+def accepted_encodings(accept_encoding: str) -> Set[str]:
+    """Returns the content codings an Accept-Encoding header allows, skipping those with q=0."""
+    accepted, refused = set(), set()
+    for token in accept_encoding.split(","):
+        coding, *params = [part.strip() for part in token.split(";")]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding.lower())
+        else:
+            refused.add(coding.lower())
+    if "*" in accepted:
+        # An explicit q=0 still excludes a coding when `*` is present (RFC 9110 12.5.3)
+        accepted.update({"br", "gzip"} - refused)
+    return accepted
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int = 4) -> None:
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        compressed = self.compressor.process(body)
+        if more_body:
+            return compressed + self.compressor.flush()
+        return compressed + self.compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Starlette's GZipMiddleware extended to prefer brotli when the client accepts it
+    and the `brotli` package is installed. Bodies under `minimum_size` go out as-is.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1000, compresslevel: int = 6, brotli_quality: int = 4) -> None:
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encodings = accepted_encodings(Headers(scope=scope).get("Accept-Encoding", ""))
+        if brotli is not None and "br" in encodings:
+            responder: ASGIApp = BrotliResponder(self.app, self.minimum_size, quality=self.brotli_quality)
+        elif "gzip" in encodings:
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+
+        async def send_with_unique_vary(message: Message) -> None:
+            # Endpoints already send `Vary: Accept-Encoding` with cache validators; the
+            # responders append it again, so collapse the duplicates
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if "vary" in headers:
+                    tokens = (token.strip() for token in headers["vary"].split(","))
+                    headers["Vary"] = ", ".join(dict.fromkeys(token for token in tokens if token))
+            await send(message)
+
+        await responder(scope, receive, send_with_unique_vary)
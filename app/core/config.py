@@ -25,6 +25,33 @@ class Settings(BaseSettings):
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
 
+    # HTTP caching (Cache-Control max-age per route, in seconds)
+    CACHE_MAX_AGE_AQI_LATEST: int = 300 # OpenAQ stations typically report hourly
+    CACHE_MAX_AGE_LOCATIONS: int = 3600
+    CACHE_MAX_AGE_AQI_HISTORICAL: int = 3600
+    CACHE_MAX_AGE_WEATHER_CURRENT: int = 600 # OpenWeatherMap refreshes current data every ~10 minutes
+    CACHE_MAX_AGE_WEATHER_FORECAST: int = 1800
+
+    # Response compression (gzip, or brotli when installed and accepted by the client)
+    COMPRESSION_MINIMUM_SIZE: int = 1000 # Bytes; smaller bodies are not worth compressing
+
+    # On-demand request profiling (adds no middleware at all when disabled)
+    PROFILING_ENABLED: bool = False
+    PROFILING_ADMIN_TOKEN: str | None = None # Requests with a matching `X-Profile` header are always profiled
+    PROFILING_SAMPLE_RATE: float = 0.0 # Fraction of other requests to profile (0.0 - 1.0)
+    PROFILING_OUTPUT_DIR: str = "profiles" # Where speedscope files are written
+    PROFILING_MAX_FILES: int = 200 # Only the newest profiles are kept; older ones are deleted
+    PROFILING_INTERVAL: float = 0.001 # Sampling interval in seconds
+
+    # Forecast grid store (5-day forecasts cached per grid cell and refreshed in the background)
+    FORECAST_GRID_RESOLUTION: float = 0.05 # Degrees (~5 km); coordinates in the same cell share a forecast
+    FORECAST_REFRESH_INTERVAL: int = 10800 # Seconds; OpenWeatherMap publishes a new 3-hourly run
+    FORECAST_SCHEDULER_INTERVAL: int = 300 # Seconds between refresh passes
+    FORECAST_ACTIVE_WINDOW: int = 21600 # Seconds; cells not requested for this long are evicted
+    FORECAST_MAX_CELLS: int = 5000
+    FORECAST_UPSTREAM_CALLS_PER_MINUTE: int = 50 # Total for the API key across all workers; keep below its limit (60/min on the free plan)
+    FORECAST_WORKERS: int = 1 # Server worker processes (e.g. uvicorn --workers); each gets an equal share of the budget
+
     # External API Keys (from .env)
     OPENAQ_API_KEY: str | None = None # OpenAQ typically doesn't require an API key for basic usage, but include for consistency
     OPENWEATHER_API_KEY: str
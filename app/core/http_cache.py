@@ -0,0 +1,109 @@
+# air_quality_app/app/core/http_cache.py
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Iterable, Optional
+
+from fastapi import Request, Response
+
+# Headers that must be repeated on a 304 so caches can refresh their stored copy
+_NOT_MODIFIED_HEADERS = ("etag", "last-modified", "cache-control", "vary")
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    """Turns an upstream timestamp (Unix `dt` or ISO 8601 `lastUpdated`) into an aware datetime."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    return None
+
+
+def latest_timestamp(values: Iterable[Any]) -> Optional[datetime]:
+    """Returns the most recent of the given upstream timestamps, ignoring anything unparseable."""
+    parsed = [ts for ts in (_parse_timestamp(v) for v in values) if ts is not None]
+    if not parsed:
+        return None
+    # Last-Modified may not be later than the response date (RFC 9110 8.8.2.1)
+    latest = min(max(parsed), datetime.now(timezone.utc))
+    # HTTP dates only have second precision, so drop the rest to keep comparisons stable
+    return latest.replace(microsecond=0)
+
+
+class CacheValidators:
+    """ETag / Last-Modified pair for a single response, derived from upstream data versions."""
+
+    def __init__(self, request: Request, last_modified: datetime, max_age: int):
+        self.last_modified = last_modified
+        self.max_age = max_age
+        # The ETag covers the exact query (path + params) and the upstream version it was built from
+        version = last_modified.isoformat()
+        digest = hashlib.sha1(f"{request.url.path}?{request.url.query}|{version}".encode()).hexdigest()
+        self.etag = f'W/"{digest[:32]}"'
+
+    def headers(self) -> dict:
+        return {
+            "ETag": self.etag,
+            "Last-Modified": format_datetime(self.last_modified, usegmt=True),
+            "Cache-Control": f"public, max-age={self.max_age}",
+            # Set here rather than only by the compression middleware so 304s carry it too
+            "Vary": "Accept-Encoding",
+        }
+
+    def is_not_modified(self, request: Request) -> bool:
+        """Evaluates If-None-Match / If-Modified-Since as per RFC 9110 (If-None-Match wins)."""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            if if_none_match.strip() == "*":
+                return True
+            # Weak comparison: strip the W/ prefix on both sides
+            candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return self.etag.removeprefix("W/") in candidates
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return self.last_modified <= since
+        return False
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    last_modified: Optional[datetime],
+    max_age: int,
+) -> Optional[Response]:
+    """
+    Attaches caching headers to `response` and checks the request's conditional headers.
+    Returns a bodiless 304 response if the client copy is still fresh, otherwise None,
+    in which case the endpoint should go on to build the full body as usual.
+    Without an upstream timestamp there is nothing to validate against, so only
+    Cache-Control is set.
+    """
+    if last_modified is None:
+        cache_control_only(response, max_age)
+        return None
+    validators = CacheValidators(request, last_modified, max_age)
+    headers = validators.headers()
+    response.headers.update(headers)
+    if validators.is_not_modified(request):
+        not_modified_headers = {k: v for k, v in headers.items() if k.lower() in _NOT_MODIFIED_HEADERS}
+        return Response(status_code=304, headers=not_modified_headers)
+    return None
+
+
+def cache_control_only(response: Response, max_age: int) -> None:
+    """Sets Cache-Control for routes with no upstream version to validate against."""
+    response.headers["Cache-Control"] = f"public, max-age={max_age}"
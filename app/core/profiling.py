@@ -0,0 +1,226 @@
+# air_quality_app/app/core/profiling.py
+
+import asyncio
+import functools
+import hmac
+import logging
+import os
+import random
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:
+    from pyinstrument import Profiler  # Optional: without it only Server-Timing is reported
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:  # pragma: no cover
+    Profiler = None
+
+logger = logging.getLogger(__name__)
+
+# Per-request phase durations in seconds; None unless the current request is being profiled
+_phase_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("phase_timings", default=None)
+
+
+class phase_timer:
+    """
+    Adds the time spent inside the block to the named phase of the current request.
+    Does nothing beyond a ContextVar lookup when the request is not being profiled.
+    """
+
+    __slots__ = ("name", "timings", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.timings = _phase_timings.get()
+        if self.timings is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.timings is not None:
+            elapsed = time.perf_counter() - self.started
+            self.timings[self.name] = self.timings.get(self.name, 0.0) + elapsed
+        return False
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that records its rendering time as the `serialization` phase."""
+
+    def render(self, content: Any) -> bytes:
+        with phase_timer("serialization"):
+            return super().render(content)
+
+
+def _timed_endpoint(endpoint):
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        with phase_timer("endpoint"):
+            return await endpoint(*args, **kwargs)
+    # include_router() re-creates routes from the already wrapped endpoint, so mark it
+    wrapper._phase_timed = True
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """
+    APIRoute that times the endpoint body and the whole route handler so that response
+    validation can be told apart from the endpoint itself. Identical to APIRoute when
+    profiling is disabled.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if (
+            settings.PROFILING_ENABLED
+            and asyncio.iscoroutinefunction(endpoint)
+            and not getattr(endpoint, "_phase_timed", False)
+        ):
+            endpoint = _timed_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        if not settings.PROFILING_ENABLED:
+            return handler
+
+        async def timed_handler(request):
+            with phase_timer("route"):
+                return await handler(request)
+        return timed_handler
+
+
+def format_server_timing(timings: Dict[str, float]) -> str:
+    """Builds a Server-Timing header value (durations in milliseconds) from raw phase timings."""
+    upstream = timings.get("upstream", 0.0)
+    endpoint = timings.get("endpoint", 0.0)
+    serialization = timings.get("serialization", 0.0)
+    phases = {
+        "upstream": upstream,
+        # Endpoint code excluding the upstream fetch
+        "handler": max(endpoint - upstream, 0.0),
+        # FastAPI validates the return value against response_model between the endpoint and rendering
+        "validation": max(timings.get("route", 0.0) - endpoint - serialization, 0.0),
+        "serialization": serialization,
+        "total": timings.get("total", 0.0),
+    }
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in phases.items())
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests that carry the admin `X-Profile` header, plus a random sample of
+    the rest. When pyinstrument is installed, a speedscope profile of the whole handler
+    (including time spent awaiting upstream APIs) is written to `output_dir`, which keeps
+    only the newest `max_files` profiles.
+
+    Only admin requests get the results back: a Server-Timing header with per-phase
+    timings and the profile's name in `X-Profile-File`, on a response marked
+    `Cache-Control: private, no-store` so shared caches never hand them to other clients.
+    Sampled requests are profiled silently.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_rate: float = 0.0,
+        admin_token: Optional[str] = None,
+        output_dir: str = "profiles",
+        interval: float = 0.001,
+        max_files: int = 200,
+    ) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+        self.admin_token = admin_token
+        self.output_dir = output_dir
+        self.max_files = max_files
+        self.interval = interval
+        if Profiler is None:
+            logger.warning("pyinstrument is not installed; only admin requests will get Server-Timing headers.")
+
+    def _is_admin(self, scope: Scope) -> bool:
+        if not self.admin_token:
+            return False
+        header = Headers(scope=scope).get("x-profile")
+        # Header values are decoded as latin-1; compare bytes since compare_digest rejects non-ASCII str
+        return header is not None and hmac.compare_digest(header.encode("latin-1"), self.admin_token.encode())
+
+    def _is_sampled(self) -> bool:
+        # Without pyinstrument there is nothing to store for a sampled request
+        return Profiler is not None and self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        is_admin = self._is_admin(scope)
+        if not is_admin and not self._is_sampled():
+            await self.app(scope, receive, send)
+            return
+
+        profile_name = f"{int(time.time())}-{uuid.uuid4().hex[:8]}.speedscope.json" if Profiler else None
+        profiler = Profiler(interval=self.interval, async_mode="enabled") if Profiler else None
+        if is_admin:
+            timings: Dict[str, float] = {}
+            token = _phase_timings.set(timings)
+            started = time.perf_counter()
+
+            async def send_with_server_timing(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    timings["total"] = time.perf_counter() - started
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", format_server_timing(timings))
+                    if profile_name:
+                        headers["X-Profile-File"] = profile_name
+                    headers["Cache-Control"] = "private, no-store"
+                await send(message)
+
+            send_to = send_with_server_timing
+        else:
+            send_to = send
+
+        if profiler:
+            profiler.start()
+        try:
+            await self.app(scope, receive, send_to)
+        finally:
+            if is_admin:
+                _phase_timings.reset(token)
+            if profiler:
+                profiler.stop()
+                await run_in_threadpool(self._write_profile, profiler, profile_name)
+
+    def _write_profile(self, profiler, profile_name: str) -> None:
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(os.path.join(self.output_dir, profile_name), "w") as f:
+                f.write(profiler.output(renderer=SpeedscopeRenderer()))
+            self._prune_profiles()
+        except OSError as e:
+            logger.error(f"Failed to write request profile {profile_name}: {e}")
+
+    def _prune_profiles(self) -> None:
+        """Deletes the oldest profiles beyond `max_files` so sampling cannot fill the disk."""
+        paths = [
+            os.path.join(self.output_dir, name)
+            for name in os.listdir(self.output_dir)
+            if name.endswith(".speedscope.json")
+        ]
+        if len(paths) <= self.max_files:
+            return
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:len(paths) - self.max_files]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Already removed by a concurrent prune
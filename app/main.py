@@ -1,16 +1,42 @@
 # air_quality_app/app/main.py
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from app.api.api import api_router
 from app.core.config import settings # Import your settings
+from app.core.compression import CompressionMiddleware
+from app.core.profiling import ProfilingMiddleware, TimedJSONResponse
+from app.services.forecast_store import forecast_store
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    forecast_store.start() # Keep popular forecast grid cells fresh in the background
+    yield
+    await forecast_store.stop()
 
 app = FastAPI(
     title=settings.APP_NAME,
     description="API for real-time and predicted air quality data.", # You can also put this in settings
     version=settings.APP_VERSION,
-    debug=settings.DEBUG # Use the debug setting
+    debug=settings.DEBUG, # Use the debug setting
+    default_response_class=TimedJSONResponse if settings.PROFILING_ENABLED else JSONResponse,
+    lifespan=lifespan
 )
 
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+
+# Added last so it is the outermost middleware and its timings cover the whole request
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+        admin_token=settings.PROFILING_ADMIN_TOKEN,
+        output_dir=settings.PROFILING_OUTPUT_DIR,
+        max_files=settings.PROFILING_MAX_FILES,
+        interval=settings.PROFILING_INTERVAL,
+    )
+
 app.include_router(api_router, prefix="/api/v1")
 
 @app.get("/")
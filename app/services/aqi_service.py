@@ -3,6 +3,7 @@
 import httpx
 from typing import List, Dict, Any, Optional
 from app.core.config import settings
+from app.core.profiling import phase_timer
 import logging
 
 # Set up logging for this module
@@ -22,10 +23,11 @@ class OpenAQService:
         """Helper to make an asynchronous GET request to the OpenAQ API."""
         url = f"{OPENAQ_API_BASE_URL}{endpoint}"
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params=params, timeout=10.0) # Add a timeout
-                response.raise_for_status() # Raise an exception for HTTP errors (4xx or 5xx)
-                return response.json()
+            with phase_timer("upstream"): # Recorded only when the request is being profiled
+                async with httpx.AsyncClient() as client:
+                    response = await client.get(url, params=params, timeout=10.0) # Add a timeout
+                    response.raise_for_status() # Raise an exception for HTTP errors (4xx or 5xx)
+                    return response.json()
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error fetching from OpenAQ {endpoint}: {e.response.status_code} - {e.response.text}")
             raise # Re-raise the exception after logging
@@ -0,0 +1,246 @@
+# air_quality_app/app/services/forecast_store.py
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.services.weather_service import OpenWeatherMapService, openweathermap_service
+
+logger = logging.getLogger(__name__)
+
+# OpenWeatherMap's 5-day forecast has 40 slots of 3 hours each
+FORECAST_MAX_CNT = 40
+FORECAST_STEP_SECONDS = 3 * 3600
+
+CellKey = Tuple[float, float, str]  # (cell latitude, cell longitude, units)
+
+
+class ForecastQuotaExceeded(Exception):
+    """Raised when a cell must be fetched but the per-minute upstream budget is used up."""
+
+
+class _CellEntry:
+    __slots__ = ("data", "fetched_at", "fetched_on", "last_access", "hits")
+
+    def __init__(self, data: Dict[str, Any], fetched_at: float):
+        self.data = data
+        self.fetched_at = fetched_at  # Monotonic, for expiry
+        self.fetched_on = time.time()  # Wall clock, for Last-Modified
+        self.last_access = fetched_at
+        self.hits = 0.0
+
+
+class _CallBudget:
+    """
+    Sliding one-minute window of upstream calls, used to keep the store within the API-key quota.
+    The window lives in process memory, so each server worker has its own budget.
+    """
+
+    def __init__(self, calls_per_minute: int):
+        self.calls_per_minute = calls_per_minute
+        self._calls: Deque[float] = deque()
+
+    def _trim(self, now: float) -> None:
+        while self._calls and now - self._calls[0] >= 60:
+            self._calls.popleft()
+
+    def remaining(self) -> int:
+        self._trim(time.monotonic())
+        return max(self.calls_per_minute - len(self._calls), 0)
+
+    def record(self) -> None:
+        self._calls.append(time.monotonic())
+
+
+class ForecastGridStore:
+    """
+    In-memory 5-day forecasts keyed by grid cell rather than by exact coordinate.
+
+    Requests are snapped to the centre of a `resolution`-degree cell and answered from
+    memory, including `cnt` slicing. A background scheduler refreshes the cells users
+    actually request before they expire, most popular first, and only as far as the
+    per-minute upstream budget allows (`calls_per_minute` is split evenly between the
+    `workers` processes sharing the API key). Cells not requested within `active_window`
+    seconds are evicted, as are the least recently used ones beyond `max_cells`.
+    """
+
+    def __init__(
+        self,
+        service: OpenWeatherMapService,
+        resolution: float = 0.05,
+        refresh_interval: int = 10800,
+        scheduler_interval: int = 300,
+        active_window: int = 21600,
+        max_cells: int = 5000,
+        calls_per_minute: int = 50,
+        workers: int = 1,
+        refresh_concurrency: int = 5,
+    ):
+        self.service = service
+        self.resolution = resolution
+        self.refresh_interval = refresh_interval
+        self.scheduler_interval = scheduler_interval
+        self.active_window = active_window
+        self.max_cells = max_cells
+        self.refresh_concurrency = refresh_concurrency
+        # Every worker process keeps its own store and budget, so each gets an equal share of the key's quota
+        self.budget = _CallBudget(calls_per_minute // max(workers, 1))
+        self._cells: "OrderedDict[CellKey, _CellEntry]" = OrderedDict()
+        self._inflight: Dict[CellKey, asyncio.Task] = {}
+        self._scheduler: Optional[asyncio.Task] = None
+
+    def cell_key(self, lat: float, lon: float, units: str) -> CellKey:
+        """Snaps a coordinate to the centre of its grid cell."""
+        step = self.resolution
+        cell_lat = round((lat // step) * step + step / 2, 6)
+        cell_lon = round((lon // step) * step + step / 2, 6)
+        return cell_lat, cell_lon, units
+
+    def last_fetched(self, lat: float, lon: float, units: str = "metric") -> Optional[float]:
+        """Unix time the cell containing (lat, lon) was last fetched from upstream, if cached."""
+        entry = self._cells.get(self.cell_key(lat, lon, units))
+        return entry.fetched_on if entry else None
+
+    async def get_forecast(self, lat: float, lon: float, units: str = "metric", cnt: int = FORECAST_MAX_CNT) -> Dict[str, Any]:
+        """
+        Returns the forecast for the grid cell containing (lat, lon), trimmed to `cnt` slots.
+        Only a missing or expired cell triggers an upstream call. If that call fails or the
+        upstream budget is used up, an expired cell is served stale; a missing one raises.
+        """
+        key = self.cell_key(lat, lon, units)
+        now = time.monotonic()
+        entry = self._cells.get(key)
+        if entry is None or now - entry.fetched_at >= self.refresh_interval:
+            try:
+                entry = await self._fetch(key)
+            except ForecastQuotaExceeded:
+                if entry is None:
+                    raise
+                logger.warning(f"Upstream budget exhausted; serving stale forecast for cell {key}.")
+            except Exception as e:
+                if entry is None:
+                    raise
+                logger.error(f"Failed to refresh forecast cell {key}, serving stale data: {e}")
+        entry.hits += 1
+        entry.last_access = now
+        if key in self._cells:
+            self._cells.move_to_end(key)
+        return self._slice(entry.data, cnt)
+
+    async def _fetch(self, key: CellKey) -> _CellEntry:
+        # Concurrent misses for the same cell share a single upstream call
+        task = self._inflight.get(key)
+        if task is None:
+            if self.budget.remaining() == 0:
+                raise ForecastQuotaExceeded(f"Upstream forecast budget of {self.budget.calls_per_minute}/min exhausted.")
+            # Record before the task runs so concurrent misses see the call when they check the budget
+            self.budget.record()
+            task = asyncio.create_task(self._load(key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _load(self, key: CellKey) -> _CellEntry:
+        cell_lat, cell_lon, units = key
+        data = await self.service.get_forecast_weather(lat=cell_lat, lon=cell_lon, units=units, cnt=FORECAST_MAX_CNT)
+        previous = self._cells.get(key)
+        entry = _CellEntry(data, time.monotonic())
+        if previous is not None:
+            # Keep popularity and recency across refreshes
+            entry.hits = previous.hits
+            entry.last_access = previous.last_access
+        self._cells[key] = entry
+        while len(self._cells) > self.max_cells:
+            evicted, _ = self._cells.popitem(last=False)
+            logger.debug(f"Evicted least recently used forecast cell {evicted}")
+        return entry
+
+    @staticmethod
+    def _slice(data: Dict[str, Any], cnt: int) -> Dict[str, Any]:
+        # Slots that ended while the cell sat in memory are dropped before slicing
+        now = time.time()
+        items = [item for item in data.get("list", []) if item.get("dt", 0) + FORECAST_STEP_SECONDS > now]
+        items = items[:cnt]
+        return {**data, "cnt": len(items), "list": items}
+
+    async def refresh_due_cells(self) -> int:
+        """
+        One scheduler pass: evicts cold cells, then refreshes active cells that would expire
+        before the next pass, most popular first, within the remaining upstream budget.
+        Returns the number of cells refreshed.
+        """
+        now = time.monotonic()
+        for key in [k for k, e in self._cells.items() if now - e.last_access > self.active_window]:
+            del self._cells[key]
+
+        due_after = self.refresh_interval - self.scheduler_interval
+        due_cells = [
+            key for key, entry in sorted(self._cells.items(), key=lambda item: item[1].hits, reverse=True)
+            if now - entry.fetched_at >= due_after and key not in self._inflight
+        ]
+        due = due_cells[:self.budget.remaining()]
+        if len(due) < len(due_cells):
+            logger.warning(
+                f"Forecast refresh budget exhausted; {len(due_cells) - len(due)} less popular cells will refresh on demand."
+            )
+
+        semaphore = asyncio.Semaphore(self.refresh_concurrency)
+
+        async def refresh(key: CellKey) -> bool:
+            async with semaphore:
+                try:
+                    await self._fetch(key)
+                    return True
+                except ForecastQuotaExceeded:
+                    # On-demand misses used the rest of the budget since this pass started
+                    logger.debug(f"Skipped refreshing forecast cell {key}: upstream budget exhausted.")
+                    return False
+                except Exception as e:
+                    logger.error(f"Failed to refresh forecast cell {key}: {e}")
+                    return False
+
+        results = await asyncio.gather(*(refresh(key) for key in due))
+
+        # Halve popularity each pass so it tracks recent demand rather than all-time totals
+        for entry in self._cells.values():
+            entry.hits /= 2
+        return sum(results)
+
+    async def _run_scheduler(self) -> None:
+        while True:
+            await asyncio.sleep(self.scheduler_interval)
+            try:
+                refreshed = await self.refresh_due_cells()
+                logger.info(f"Refreshed {refreshed} of {len(self._cells)} forecast cells.")
+            except Exception as e:
+                logger.error(f"Forecast refresh pass failed: {e}")
+
+    def start(self) -> None:
+        """Starts the background refresh scheduler on the running event loop."""
+        if self._scheduler is None:
+            self._scheduler = asyncio.create_task(self._run_scheduler())
+
+    async def stop(self) -> None:
+        if self._scheduler is not None:
+            self._scheduler.cancel()
+            try:
+                await self._scheduler
+            except asyncio.CancelledError:
+                pass
+            self._scheduler = None
+
+
+# Initialize the store
+forecast_store = ForecastGridStore(
+    openweathermap_service,
+    resolution=settings.FORECAST_GRID_RESOLUTION,
+    refresh_interval=settings.FORECAST_REFRESH_INTERVAL,
+    scheduler_interval=settings.FORECAST_SCHEDULER_INTERVAL,
+    active_window=settings.FORECAST_ACTIVE_WINDOW,
+    max_cells=settings.FORECAST_MAX_CELLS,
+    calls_per_minute=settings.FORECAST_UPSTREAM_CALLS_PER_MINUTE,
+    workers=settings.FORECAST_WORKERS,
+)
@@ -3,6 +3,7 @@
 import httpx
 from typing import Dict, Any, Optional
 from app.core.config import settings
+from app.core.profiling import phase_timer
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,10 +23,11 @@ class OpenWeatherMapService:
         url = f"{OPENWEATHER_API_BASE_URL}{endpoint}"
         full_params = {"appid": self.api_key, **(params or {})}
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params=full_params, timeout=10.0)
-                response.raise_for_status() # Raise an exception for HTTP errors (4xx or 5xx)
-                return response.json()
+            with phase_timer("upstream"): # Recorded only when the request is being profiled
+                async with httpx.AsyncClient() as client:
+                    response = await client.get(url, params=full_params, timeout=10.0)
+                    response.raise_for_status() # Raise an exception for HTTP errors (4xx or 5xx)
+                    return response.json()
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error fetching from OpenWeatherMap {endpoint}: {e.response.status_code} - {e.response.text}")
             raise # Re-raise the exception after logging
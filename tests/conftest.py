@@ -0,0 +1,8 @@
+import os
+
+# Settings are read at import time; provide the required values so the app can load without a .env
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("OPENWEATHER_API_KEY", "test")
+os.environ.setdefault("MAPBOX_ACCESS_TOKEN", "test")
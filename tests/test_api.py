@@ -0,0 +1,136 @@
+import time
+from email.utils import format_datetime, parsedate_to_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.compression import accepted_encodings
+from app.main import app
+from app.services.aqi_service import openaq_service
+from app.services.weather_service import openweathermap_service
+
+LAST_UPDATED = "2024-05-01T10:00:00+00:00"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def fake_get_locations(city=None, country=None, limit=100):
+        return [
+            {"id": i, "location": f"Station {i}", "city": "Delhi", "country": "IN",
+             "latitude": 28.6, "longitude": 77.2, "lastUpdated": LAST_UPDATED}
+            for i in range(50)
+        ]
+
+    monkeypatch.setattr(openaq_service, "get_locations", fake_get_locations)
+    return TestClient(app)
+
+
+def test_locations_sets_cache_validators(client):
+    response = client.get("/api/v1/locations")
+    assert response.status_code == 200
+    assert response.headers["etag"].startswith('W/"')
+    assert response.headers["last-modified"] == "Wed, 01 May 2024 10:00:00 GMT"
+    assert response.headers["cache-control"] == "public, max-age=3600"
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_if_none_match_returns_304(client):
+    etag = client.get("/api/v1/locations").headers["etag"]
+    response = client.get("/api/v1/locations", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_if_none_match_mismatch_returns_200(client):
+    response = client.get("/api/v1/locations", headers={"If-None-Match": 'W/"stale"'})
+    assert response.status_code == 200
+
+
+def test_etag_depends_on_query(client):
+    etag = client.get("/api/v1/locations").headers["etag"]
+    response = client.get("/api/v1/locations?limit=5", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+
+def test_if_modified_since(client):
+    last_modified = client.get("/api/v1/locations").headers["last-modified"]
+    assert client.get("/api/v1/locations", headers={"If-Modified-Since": last_modified}).status_code == 304
+    earlier = format_datetime(parsedate_to_datetime(last_modified) - timedelta(hours=1), usegmt=True)
+    assert client.get("/api/v1/locations", headers={"If-Modified-Since": earlier}).status_code == 200
+
+
+def test_if_none_match_takes_precedence(client):
+    last_modified = client.get("/api/v1/locations").headers["last-modified"]
+    response = client.get(
+        "/api/v1/locations",
+        headers={"If-None-Match": 'W/"stale"', "If-Modified-Since": last_modified},
+    )
+    assert response.status_code == 200
+
+
+def test_last_modified_never_in_the_future(monkeypatch):
+    async def fake_get_current_weather(lat, lon, units="metric"):
+        return {
+            "coord": {"lon": lon, "lat": lat},
+            "weather": [{"id": 800, "main": "Clear", "description": "clear sky", "icon": "01d"}],
+            "base": "stations",
+            "main": {"temp": 30.0, "feels_like": 31.0, "temp_min": 29.0, "temp_max": 31.0, "pressure": 1010, "humidity": 40},
+            "wind": {"speed": 2.0, "deg": 180},
+            "clouds": {"all": 0},
+            "dt": int(time.time()) + 86400,
+            "timezone": 19800,
+            "name": "Delhi",
+            "cod": 200,
+        }
+
+    monkeypatch.setattr(openweathermap_service, "get_current_weather", fake_get_current_weather)
+    response = TestClient(app).get("/api/v1/weather/current?latitude=28.6&longitude=77.2")
+    assert response.status_code == 200
+    assert parsedate_to_datetime(response.headers["last-modified"]) <= datetime.now(timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("gzip", "gzip"),
+        ("br;q=0, gzip", "gzip"),
+        ("gzip;q=0", None),
+        ("identity", None),
+    ],
+)
+def test_compression_negotiation(client, accept_encoding, expected):
+    response = client.get("/api/v1/locations", headers={"Accept-Encoding": accept_encoding})
+    assert response.status_code == 200
+    assert response.headers.get("content-encoding") == expected
+    assert len(response.json()) == 50
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_brotli_preferred_when_accepted(client):
+    pytest.importorskip("brotli")
+    response = client.get("/api/v1/locations", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert len(response.json()) == 50
+
+
+def test_small_bodies_are_not_compressed(client):
+    response = client.get("/api/v1/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("gzip, br;q=0.5", {"gzip", "br"}),
+        ("br;q=0, gzip;q=1.0", {"gzip"}),
+        ("br; q=0.0", set()),
+        ("*", {"*", "br", "gzip"}),
+        ("gzip;q=0, *", {"*", "br"}),
+        ("", set()),
+    ],
+)
+def test_accepted_encodings(accept_encoding, expected):
+    assert accepted_encodings(accept_encoding) == expected
@@ -0,0 +1,182 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.forecast_store import FORECAST_STEP_SECONDS, ForecastGridStore, ForecastQuotaExceeded
+
+
+class FakeWeatherService:
+    def __init__(self, delay=0.0, fail=False):
+        self.calls = []
+        self.delay = delay
+        self.fail = fail
+
+    async def get_forecast_weather(self, lat, lon, units="metric", cnt=40):
+        self.calls.append((lat, lon, units, cnt))
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        now = int(time.time())
+        # First slot ended an hour ago, the rest follow every 3 hours
+        start = now - FORECAST_STEP_SECONDS - 3600
+        return {
+            "cod": "200",
+            "message": 0,
+            "cnt": 40,
+            "list": [{"dt": start + i * FORECAST_STEP_SECONDS} for i in range(40)],
+            "city": {"coord": {"lat": lat, "lon": lon}},
+        }
+
+
+def expire(store):
+    for entry in store._cells.values():
+        entry.fetched_at -= store.refresh_interval
+
+
+def test_cell_key_snaps_to_cell_centre():
+    store = ForecastGridStore(FakeWeatherService(), resolution=0.05)
+    assert store.cell_key(12.971, 77.591, "metric") == (12.975, 77.575, "metric")
+    assert store.cell_key(12.999, 77.599, "metric") == (12.975, 77.575, "metric")
+    assert store.cell_key(13.001, 77.591, "metric") == (13.025, 77.575, "metric")
+    assert store.cell_key(-0.01, -0.01, "imperial") == (-0.025, -0.025, "imperial")
+
+
+def test_nearby_coordinates_share_one_upstream_call_and_cnt_is_sliced():
+    service = FakeWeatherService()
+    store = ForecastGridStore(service)
+
+    async def run():
+        first = await store.get_forecast(12.971, 77.591, cnt=5)
+        second = await store.get_forecast(12.972, 77.592, cnt=40)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert len(service.calls) == 1
+    assert service.calls[0][3] == 40
+    assert first["cnt"] == len(first["list"]) == 5
+    # The slot that already ended is dropped
+    assert second["cnt"] == 39
+    assert all(item["dt"] + FORECAST_STEP_SECONDS > time.time() for item in second["list"])
+
+
+def test_concurrent_misses_are_single_flight():
+    service = FakeWeatherService(delay=0.01)
+    store = ForecastGridStore(service)
+
+    async def run():
+        return await asyncio.gather(*(store.get_forecast(1.0, 1.0, cnt=3) for _ in range(10)))
+
+    results = asyncio.run(run())
+    assert len(service.calls) == 1
+    assert all(result["cnt"] == 3 for result in results)
+
+
+def test_lru_eviction_beyond_max_cells():
+    store = ForecastGridStore(FakeWeatherService(), max_cells=2)
+
+    async def run():
+        await store.get_forecast(1.0, 1.0)
+        await store.get_forecast(2.0, 2.0)
+        await store.get_forecast(1.0, 1.0)  # Touch the first cell so the second is least recent
+        await store.get_forecast(3.0, 3.0)
+
+    asyncio.run(run())
+    assert set(store._cells) == {store.cell_key(1.0, 1.0, "metric"), store.cell_key(3.0, 3.0, "metric")}
+
+
+def test_refresh_pass_evicts_cold_cells_and_refreshes_popular_first():
+    service = FakeWeatherService()
+    store = ForecastGridStore(service, calls_per_minute=5)
+
+    async def run():
+        await store.get_forecast(1.0, 1.0)
+        for _ in range(3):
+            await store.get_forecast(2.0, 2.0)
+        await store.get_forecast(3.0, 3.0)
+        expire(store)
+        store._cells[store.cell_key(3.0, 3.0, "metric")].last_access -= store.active_window + 1
+        # Leave budget for a single refresh
+        for _ in range(store.budget.remaining() - 1):
+            store.budget.record()
+        return await store.refresh_due_cells()
+
+    assert asyncio.run(run()) == 1
+    assert store.cell_key(3.0, 3.0, "metric") not in store._cells
+    assert service.calls[-1][:2] == store.cell_key(2.0, 2.0, "metric")[:2]
+
+
+def test_misses_are_limited_by_budget():
+    service = FakeWeatherService()
+    store = ForecastGridStore(service, calls_per_minute=5)
+
+    async def run():
+        served, rejected = 0, 0
+        for i in range(50):
+            try:
+                await store.get_forecast(float(i), float(i))
+                served += 1
+            except ForecastQuotaExceeded:
+                rejected += 1
+        return served, rejected
+
+    assert asyncio.run(run()) == (5, 45)
+    assert len(service.calls) == 5
+
+
+def test_concurrent_misses_are_limited_by_budget():
+    service = FakeWeatherService(delay=0.01)
+    store = ForecastGridStore(service, calls_per_minute=5)
+
+    async def run():
+        return await asyncio.gather(
+            *(store.get_forecast(float(i), float(i)) for i in range(50)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert sum(isinstance(result, ForecastQuotaExceeded) for result in results) == 45
+    assert len(service.calls) == 5
+
+
+def test_budget_is_split_between_workers():
+    store = ForecastGridStore(FakeWeatherService(), calls_per_minute=50, workers=4)
+    assert store.budget.remaining() == 12
+
+
+def test_expired_cell_served_stale_when_budget_exhausted_or_upstream_fails():
+    service = FakeWeatherService()
+    store = ForecastGridStore(service, calls_per_minute=2)
+
+    async def run():
+        fresh = await store.get_forecast(1.0, 1.0, cnt=4)
+        expire(store)
+        store.budget.record()
+        stale_on_quota = await store.get_forecast(1.0, 1.0, cnt=4)
+        service.fail = True
+        store.budget._calls.clear()
+        stale_on_error = await store.get_forecast(1.0, 1.0, cnt=4)
+        return fresh, stale_on_quota, stale_on_error
+
+    fresh, stale_on_quota, stale_on_error = asyncio.run(run())
+    assert stale_on_quota == fresh
+    assert stale_on_error == fresh
+
+
+def test_missing_cell_raises_when_upstream_fails():
+    store = ForecastGridStore(FakeWeatherService(fail=True))
+    with pytest.raises(RuntimeError):
+        asyncio.run(store.get_forecast(1.0, 1.0))
+
+
+def test_forecast_endpoint_rejects_unknown_units_and_returns_503_on_quota(monkeypatch):
+    store = ForecastGridStore(FakeWeatherService(), calls_per_minute=0)
+    monkeypatch.setattr("app.api.v1.endpoints.weather.forecast_store", store)
+    client = TestClient(app)
+    assert client.get("/api/v1/weather/forecast?latitude=1&longitude=1&units=bogus").status_code == 422
+    response = client.get("/api/v1/weather/forecast?latitude=1&longitude=1")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "60"
+    assert store._cells == {}
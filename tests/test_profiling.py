@@ -0,0 +1,126 @@
+import asyncio
+import importlib
+import os
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+import app.api.api
+import app.api.v1.endpoints.aqi
+import app.api.v1.endpoints.health
+import app.api.v1.endpoints.weather
+import app.main
+from app.core.config import settings
+from app.core.profiling import ProfilingMiddleware
+
+# Modules whose routes and middleware are built from settings at import time, in dependency order
+APP_MODULES = [
+    app.api.v1.endpoints.aqi,
+    app.api.v1.endpoints.health,
+    app.api.v1.endpoints.weather,
+    app.api.api,
+    app.main,
+]
+
+
+def reload_app():
+    for module in APP_MODULES:
+        importlib.reload(module)
+    return app.main.app
+
+
+@pytest.fixture
+def profiled_app(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(settings, "PROFILING_ADMIN_TOKEN", "s3cret")
+    monkeypatch.setattr(settings, "PROFILING_OUTPUT_DIR", str(tmp_path))
+
+    async def fake_get(self, url, params=None, timeout=None):
+        await asyncio.sleep(0.02)
+        results = [
+            {"id": 1, "location": "Station 1", "city": "Delhi", "country": "IN",
+             "latitude": 28.6, "longitude": 77.2, "lastUpdated": "2024-05-01T10:00:00+00:00"}
+        ]
+        return httpx.Response(200, json={"results": results}, request=httpx.Request("GET", url))
+
+    # Patch the HTTP client rather than _make_request so its upstream timer still runs
+    monkeypatch.setattr(httpx.AsyncClient, "get", fake_get)
+    yield reload_app()
+    monkeypatch.undo()
+    reload_app()
+
+
+def make_client(tmp_path, sample_rate=0.0):
+    app = FastAPI()
+
+    @app.get("/")
+    async def root():
+        return {"ok": True}
+
+    app.add_middleware(ProfilingMiddleware, sample_rate=sample_rate, admin_token="s3cret", output_dir=str(tmp_path))
+    return TestClient(app)
+
+
+def test_admin_request_gets_private_timings(tmp_path):
+    response = make_client(tmp_path).get("/", headers={"X-Profile": "s3cret"})
+    assert response.status_code == 200
+    assert "total;dur=" in response.headers["server-timing"]
+    assert response.headers["cache-control"] == "private, no-store"
+
+
+def test_wrong_or_non_ascii_token_is_ignored(tmp_path):
+    client = make_client(tmp_path)
+    for value in ("wrong", "caf\xe9"):
+        response = client.get("/", headers={"X-Profile": value.encode("latin-1")})
+        assert response.status_code == 200
+        assert "server-timing" not in response.headers
+
+
+def test_sampled_request_is_profiled_silently(tmp_path):
+    pytest.importorskip("pyinstrument")
+    response = make_client(tmp_path, sample_rate=1.0).get("/")
+    assert response.status_code == 200
+    assert "server-timing" not in response.headers
+    assert "x-profile-file" not in response.headers
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test_max_files_keeps_newest_profiles(tmp_path):
+    pytest.importorskip("pyinstrument")
+    client = TestClient(FastAPI())
+    client.app.add_middleware(ProfilingMiddleware, sample_rate=1.0, output_dir=str(tmp_path), max_files=2)
+    for _ in range(4):
+        client.get("/")
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_profiled_app_reports_every_phase(profiled_app):
+    response = TestClient(profiled_app).get("/api/v1/locations", headers={"X-Profile": "s3cret"})
+    assert response.status_code == 200
+    phases = {
+        name: float(duration.removeprefix("dur="))
+        for name, duration in (entry.strip().split(";") for entry in response.headers["server-timing"].split(","))
+    }
+    assert set(phases) == {"upstream", "handler", "validation", "serialization", "total"}
+    assert phases["upstream"] >= 20
+    # A re-wrapped endpoint would be timed once per include_router() and inflate `handler`
+    assert phases["handler"] < phases["upstream"]
+    assert phases["total"] >= phases["upstream"]
+
+
+def test_profiled_routes_are_wrapped_once(profiled_app):
+    route = next(r for r in profiled_app.routes if getattr(r, "path", None) == "/api/v1/locations")
+    assert route.endpoint._phase_timed
+    assert not hasattr(route.endpoint.__wrapped__, "__wrapped__")
+
+
+def test_nothing_installed_when_disabled():
+    assert not settings.PROFILING_ENABLED
+    application = app.main.app
+    assert not any(m.cls is ProfilingMiddleware for m in application.user_middleware)
+    assert application.router.default_response_class is JSONResponse
+    route = next(r for r in application.routes if getattr(r, "path", None) == "/api/v1/locations")
+    assert not hasattr(route.endpoint, "_phase_timed")